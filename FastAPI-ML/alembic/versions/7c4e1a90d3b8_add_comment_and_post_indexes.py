@@ -0,0 +1,37 @@
+"""Add comment and post indexes
+
+Revision ID: 7c4e1a90d3b8
+Revises: 226fb135fbc2
+Create Date: 2026-09-01 10:42:17.504312
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e1a90d3b8'
+down_revision = '226fb135fbc2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # comments are always looked up by post_id, make that an index scan
+    op.create_index('ix_comments_post_id', 'comments', ['post_id'])
+    # on Postgres, a covering index lets the post lookup be served from the
+    # index alone (no heap fetch); other dialects skip it since posts.id is
+    # already the primary key there
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_posts_covering',
+            'posts',
+            ['id'],
+            postgresql_include=['title', 'content', 'publication_date'],
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_posts_covering', table_name='posts')
+    op.drop_index('ix_comments_post_id', table_name='comments')
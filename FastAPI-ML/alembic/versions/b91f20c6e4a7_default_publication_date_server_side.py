@@ -0,0 +1,54 @@
+"""Default publication_date server side
+
+Revision ID: b91f20c6e4a7
+Revises: 7c4e1a90d3b8
+Create Date: 2026-09-01 14:05:48.217904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b91f20c6e4a7'
+down_revision = '7c4e1a90d3b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_post/create_comment no longer bind publication_date when the
+    # client omits it, so existing alembic-managed databases need the same
+    # server default the table definitions now declare; batch mode keeps the
+    # ALTER working on SQLite, which cannot alter columns in place
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.alter_column(
+            'publication_date',
+            existing_type=sa.DateTime(),
+            existing_nullable=False,
+            server_default=sa.func.now(),
+        )
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.alter_column(
+            'publication_date',
+            existing_type=sa.DateTime(),
+            existing_nullable=False,
+            server_default=sa.func.now(),
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.alter_column(
+            'publication_date',
+            existing_type=sa.DateTime(),
+            existing_nullable=False,
+            server_default=None,
+        )
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.alter_column(
+            'publication_date',
+            existing_type=sa.DateTime(),
+            existing_nullable=False,
+            server_default=None,
+        )
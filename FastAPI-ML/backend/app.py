@@ -1,12 +1,42 @@
-import re
-from typing import List, Tuple,cast,Mapping  # type annotations for the type hints
-from databases import Database # Database is a class that defines a database connection
+import asyncio # asyncio is used to warm up the connection pool concurrently at startup
+import json # json is used to parse the aggregated comments column returned by the database
+import sqlite3 # sqlite3 provides the IntegrityError raised by the dev database on a bad foreign key
+from functools import lru_cache # lru_cache memoizes the pagination dependency
+from typing import Tuple, cast, Mapping  # type annotations for the type hints
+from cachetools import TTLCache # TTLCache is an in-process cache with per-entry expiry
 from fastapi import FastAPI, Query, Path, Body, Header, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse # orjson serializes responses in C instead of the stdlib json module
 
-from database import get_database, sqlalchemy_engine # get_database is a function that returns a database connection
+from sqlalchemy import bindparam, select # bindparam lets us pre-compile queries once with named placeholders
+
+# database is a process-wide singleton, so the endpoints bind it directly at import
+# time instead of resolving it through FastAPI's dependency machinery every request
+from database import POOL_MIN_SIZE, USE_SQLITE, database, sqlalchemy_engine
 from models import  comments, metadata,posts,CommentCreate, CommentDB, PostDB, PostCreate,  PostPartialUpdate,PostPublic
 
-app = FastAPI()
+# The exceptions the drivers raise when an INSERT violates a constraint
+# (e.g. a comment pointing at a post that does not exist).
+# asyncpg is only present when running against Postgres, so it is optional here.
+INTEGRITY_ERRORS: tuple = (sqlite3.IntegrityError,)
+try:
+    import asyncpg
+    INTEGRITY_ERRORS += (asyncpg.IntegrityConstraintViolationError,)
+except ImportError:
+    asyncpg = None
+
+
+def is_foreign_key_violation(error: Exception) -> bool:
+    '''
+    Only a foreign key violation means "the referenced row does not exist";
+    other integrity failures (NOT NULL, CHECK) must surface as real errors
+    instead of being mistaken for a missing post.
+    '''
+    if isinstance(error, sqlite3.IntegrityError):
+        return "FOREIGN KEY" in str(error)
+    return asyncpg is not None and isinstance(error, asyncpg.ForeignKeyViolationError)
+
+# default_response_class swaps the stdlib json.dumps pass for a single C pass in orjson
+app = FastAPI(default_response_class=ORJSONResponse)
 
 @app.on_event("startup") # on_event is a FastAPI decorator that allows us to perform an action when the application starts
 async def startup():
@@ -17,81 +47,154 @@ async def startup():
     create_all is a function that creates all the tables in the database (defined in the metadata object)
     # sqlalchemy_engine is a connection to the database
     '''
-    await get_database().connect()
-    metadata.create_all(sqlalchemy_engine)
+    # connect() and create_all() touch different connections, so they run
+    # concurrently; to_thread keeps the sync DDL call off the event loop
+    await asyncio.gather(
+        database.connect(),
+        asyncio.to_thread(metadata.create_all, sqlalchemy_engine),
+    )
+    # warm the pool: run one trivial query per pooled connection so the first
+    # real requests don't each pay the TCP/TLS handshake for a fresh connection
+    await asyncio.gather(
+        *[database.fetch_val("SELECT 1") for _ in range(POOL_MIN_SIZE)]
+    )
 
 @app.on_event("shutdown") # on_event is a FastAPI decorator that allows us to perform an action when the application stops
 async def shutdown():
     '''
     close is a function that closes the database connection
     '''
-    await get_database().disconnect()
+    await database.disconnect()
 
 # Pagination is a process that is used to divide a large data into smaller discrete pages
-def pagination(skip: int = Query(0, ge=0) ,limit: int = Query(10, ge=0)) -> Tuple[int, int]:
+# The Query descriptors are built once at import time instead of on every request
+SKIP_QUERY = Query(0, ge=0)
+LIMIT_QUERY = Query(10, ge=0)
+
+@lru_cache(maxsize=128)
+def pagination(skip: int = SKIP_QUERY, limit: int = LIMIT_QUERY) -> Tuple[int, int]:
     '''
     This function is used to paginate the results of a query.
     The function has two parameters, skip and limit.
     skip is the number of results to skip., its type int and it must be greater than or equal to 0. (default 0)
     limit is the number of results to return., its type int and it must be greater than or equal to 0. (default 10)
-    capped_limit is the maximum number of results to return., its type int and it must be greater than or equal to 0. (default 100)
+    The limit is capped at 100 results per page.
     return is a tuple with two elements, the first is the number of results to skip, the second is the number of results to return.
+    The dependency is a plain sync function (no awaits, so no event-loop round-trip)
+    and lru_cache memoizes the tuple for the handful of (skip, limit) pairs clients actually use.
     '''
-    capped_limit = min(100, limit)
-    return (skip, capped_limit)
-   
+    return (skip, 100 if limit > 100 else limit)
+
+
+# Hot queries are built once at import time with bindparam placeholders, so the
+# SQLAlchemy expression is not rebuilt on every request and asyncpg's
+# prepared-statement cache sees the same SQL text each time. Per-request values
+# are bound with .params() - the databases library does not accept a values
+# dict alongside a Select the way it does for text queries.
+SELECT_POSTS_PAGE = posts.select().offset(bindparam("skip")).limit(bindparam("limit"))
+
+# SQLite only enforces foreign keys when each connection issues
+# PRAGMA foreign_keys=ON, which the databases driver never does, so the dev
+# path checks a post exists before inserting a comment against it
+SELECT_POST_ID = select(posts.c.id).where(posts.c.id == bindparam("id"))
 
+# plain post-row lookup, used when a PATCH has nothing to write
+SELECT_POST_ROW = posts.select().where(posts.c.id == bindparam("id"))
 
-async def get_post_or_404(id: int, database: Database = Depends(get_database)) -> PostPublic:
+# One LEFT JOIN that returns the post row plus all its comments aggregated into a
+# single JSON column, so fetching a post costs one round-trip instead of two.
+# (Running the old post/comments SELECTs concurrently with asyncio.gather would
+# also overlap the round-trips, but it holds two pool connections per request;
+# the JOIN gets the same wall-time win on a single connection.)
+# COALESCE + FILTER turns "post with no comments" into an empty JSON array instead of [null].
+SELECT_POST_WITH_COMMENTS = """
+    SELECT posts.*,
+           COALESCE(json_agg(comments) FILTER (WHERE comments.id IS NOT NULL), '[]') AS comments
+    FROM posts
+    LEFT JOIN comments ON comments.post_id = posts.id
+    WHERE posts.id = :id
+    GROUP BY posts.id
+"""
+# SQLite has no json_agg; json_group_array(json_object(...)) builds the same JSON array
+if USE_SQLITE:
+    SELECT_POST_WITH_COMMENTS = """
+        SELECT posts.*,
+               COALESCE(json_group_array(
+                   json_object(
+                       'id', comments.id,
+                       'post_id', comments.post_id,
+                       'publication_date', comments.publication_date,
+                       'content', comments.content
+                   )
+               ) FILTER (WHERE comments.id IS NOT NULL), '[]') AS comments
+        FROM posts
+        LEFT JOIN comments ON comments.post_id = posts.id
+        WHERE posts.id = :id
+        GROUP BY posts.id
+    """
+
+
+# Read-through cache for hot posts: a cache hit turns a DB round-trip into a dict
+# lookup. Entries expire after 30 seconds and are evicted eagerly by every write
+# that touches the post (update_post, delete_post, create_comment).
+POST_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+async def get_post_or_404(id: int) -> PostPublic:
     '''
     This function is used to get a post from the database.
     If the post is not found, raise a 404 error.
-    takes two arguements, id and database.
+    takes one arguement, id.
     id is the id of the post to get.
-    database is the database connection.
-    Depends is a FastAPI decorator that allows us to inject a dependency. (we can inject a database connection)
-    
+    The module-level database singleton is used directly rather than injected.
+    The post and all its comments come back in a single query (see SELECT_POST_WITH_COMMENTS),
+    halving the round-trips and the time a pool connection is held per request.
+    Repeated reads of the same post within the TTL are served from POST_CACHE
+    without touching the database at all.
     '''
-    # select * from posts where id = id
-    select_post_query = posts.select().where(posts.c.id == id)
-    # raw posts is a list of dictionaries that represent the rows in the posts table
-    raw_post = await database.fetch_one(select_post_query)
+    cached_post = POST_CACHE.get(id)
+    if cached_post is not None:
+        return cached_post
+
+    raw_post = await database.fetch_one(SELECT_POST_WITH_COMMENTS, {"id": id})
 
     # if the post is not found, raise a 404 error
     if raw_post is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    # select_comments_query is a query that selects all the comments for a post by matching the post id with the comment post id
-    select_post_comments_query = comments.select().where(comments.c.post_id == id)
-    # raw_comments is a list of dictionaries that represent the rows in the comments table
-    raw_comments = await database.fetch_all(select_post_comments_query)
-    # comments is a list of CommentDB objects that represent the rows in the comments table
-    comments_list = [CommentDB(**comment) for comment in raw_comments]
-
-    return PostPublic(**raw_post, comments=comments_list)
+    # split the aggregated comments column off the post columns
+    raw_post = dict(raw_post)
+    raw_comments = raw_post.pop("comments")
+    # the driver may hand the aggregate back as a JSON string rather than a parsed list
+    if isinstance(raw_comments, str):
+        raw_comments = json.loads(raw_comments)
+    # one model_validate call turns the whole payload - post columns and the
+    # decoded comment dicts - into a properly typed PostPublic in a single
+    # pydantic-core (Rust) pass. The raw text query bypasses SQLAlchemy's type
+    # processors, so on SQLite publication_date arrives as a plain string and
+    # must be validated here, not model_construct-ed around.
+    post_public = PostPublic.model_validate({**raw_post, "comments": raw_comments})
+    POST_CACHE[id] = post_public
+    return post_public
  
 @app.get("/posts") # get is a FastAPI decorator that defines a GET request
 
 # list_posts is a function that returns a list of posts, takes two arguments
-async def list_posts(pagination: Tuple[int,int] = Depends(pagination),database: Database = Depends(get_database),) -> List[PostDB]:
+async def list_posts(pagination: Tuple[int,int] = Depends(pagination)):
     '''
     This function is used to get a list of posts from the database.
-    takes two arguments, pagination and database.
+    takes one argument, pagination.
     pagination is a tuple with two elements, the first is the number of results to skip, the second is the number of results to return.
-    database is the database connection.
-    List is a built-in Python type that is used to store a list of objects.
-    PostDB is a class that defines a post.
+    The rows go straight from the driver to orjson as plain dicts - no intermediate
+    Pydantic models to build and re-walk, no response_model pass, one C serialization.
     '''
     skip, limit = pagination # skip is the number of results to skip, limit is the number of results to return
-    select_query = posts.select().offset(skip).limit(limit) # select_query is a sqlalchemy query that selects all the posts from the database
-    rows = await database.fetch_all(select_query) # rows is a list of tuples that contains the results of the select_query
-    # results is a list of PostDB objects that is defined in the models.py file
-    results = []
-    for row in rows: # for each row in rows
-        results.append(PostDB(**row)) # append the row to the results list
-    return results
+    # the query object was built once at import time, only the bound values change here
+    rows = await database.fetch_all(SELECT_POSTS_PAGE.params(skip=skip, limit=limit))
+    return [dict(row) for row in rows]
 
 
-@app.get("posts/{id}", response_model=PostDB) # get is a FastAPI decorator that defines a GET request
+# the path needs the leading slash - without it the route never matches and every
+# GET /posts/{id} fell through to 404; exclude_none trims the serialized payload
+@app.get("/posts/{id}", response_model=PostDB, response_model_exclude_none=True)
 # response_model is a FastAPI decorator that defines the response model for the request.
 # get_post is a function that returns a post
 async def get_posts(post: PostDB = Depends(get_post_or_404)) -> PostDB:
@@ -100,94 +203,138 @@ async def get_posts(post: PostDB = Depends(get_post_or_404)) -> PostDB:
 
 @app.post("/posts", response_model=PostDB, status_code = status.HTTP_201_CREATED) # post is a FastAPI decorator that defines a POST request
 # create_post is a function that creates a post
-async def create_post(post: PostCreate, database: Database = Depends(get_database)) -> PostDB:
+async def create_post(post: PostCreate) -> PostDB:
     '''
     This function is used to create a post in the database.
-    takes two arguments, post and database.
+    takes one argument, post.
     post is the post to create.
-    database is the database connection.
     PostDB is a class that defines a post.
     insert_query is a sqlalchemy query that inserts a post into the database.
     post_id is the id of the post that was inserted.
     post_db is the post that was inserted.
     return is the post that was inserted.'''
-    insert_query = posts.insert().values(post.dict())
-    post_id = await database.execute(insert_query)
-
-    post_db = await get_post_or_404(post_id, database)
+    # RETURNING hands the freshly inserted row back with the INSERT itself,
+    # so there is no second round-trip to reload what we just wrote
+    insert_query = posts.insert().values(post.model_dump(exclude_unset=True)).returning(*posts.c)
+    raw_post = cast(Mapping, await database.fetch_one(insert_query))
 
-    return post_db
+    return PostDB.model_construct(**raw_post) # RETURNING rows are DB-typed, skip re-validation
 
 
 @app.patch("/posts/{id}", response_model=PostDB)
 # update_post is a function that updates a post
-async def update_post(post_update: PostPartialUpdate,post: PostDB = Depends(get_post_or_404),database: Database = Depends(get_database)) -> PostDB:
+async def update_post(id: int, post_update: PostPartialUpdate) -> PostDB:
     '''
     This function is used to update a post in the database.
-    takes three arguments, post_update, post and database.
+    takes two arguments, id and post_update.
+    id is the id of the post to update.
     post_update is the post to update.
-    post is the post to update.
-    database is the database connection.
     PostDB is a class that defines a post.
-    update_query is a sqlalchemy query that updates a post in the database.
-    where_clause is a sqlalchemy where clause that filters the posts to update.
-    c.id is the id of the post to update.'''
+    The UPDATE both checks existence and returns the modified row, so the whole
+    PATCH is one statement instead of SELECTing the post (and its comments) first.
+    Note there is deliberately no second get_post_or_404 call here: the RETURNING
+    row already reflects the update, so re-reading it would be a wasted round-trip.
+    '''
+    # reading model_fields_set directly skips the generic model_dump walker,
+    # which visits every field (and allocates an intermediate dict) per PATCH
+    changed_values = {field: getattr(post_update, field) for field in post_update.model_fields_set}
+
+    # an empty PATCH body is valid input but compiles to an UPDATE with no SET
+    # clause, which is invalid SQL - there is nothing to write, so just return
+    # the current row (or 404 if the post does not exist)
+    if not changed_values:
+        raw_post = await database.fetch_one(SELECT_POST_ROW.params(id=id))
+        if raw_post is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+        return PostDB.model_construct(**raw_post) # Core query rows are DB-typed, skip re-validation
+
     update_query = (
         posts.update()
-        .where(posts.c.id == post.id)
-        .values(post_update.dict(exclude_unset=True))
+        .where(posts.c.id == id)
+        .values(changed_values)
+        .returning(*posts.c)
     )
-    await database.execute(update_query)
+    raw_post = await database.fetch_one(update_query)
+
+    # zero rows updated means the post does not exist
+    if raw_post is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
-    post_db = await get_post_or_404(post.id, database)
+    # the cached copy is stale now, drop it so the next read sees the update
+    POST_CACHE.pop(id, None)
 
-    return post_db
+    return PostDB.model_construct(**raw_post) # RETURNING rows are DB-typed, skip re-validation
 
 
 # delete is a FastAPI decorator that defines a DELETE request
 @app.delete("/posts/{id}", status_code=status.HTTP_204_NO_CONTENT)
 # delete_post is a function that deletes a post
-async def delete_post(post: PostDB = Depends(get_post_or_404), database: Database = Depends(get_database)):
+async def delete_post(id: int):
     '''
     This function is used to delete a post from the database.
-    takes two arguments, post and database.
-    post is the post to delete.
-    database is the database connection.
-    delete_query is a sqlalchemy query that deletes a post from the database.
-    where_clause is a sqlalchemy where clause that filters the posts to delete.
+    takes one argument, id.
+    id is the id of the post to delete.
+    The DELETE itself tells us whether the post existed (via RETURNING), so there
+    is no need to load the post and its comments first just to check existence.
     '''
-    delete_query = posts.delete().where(posts.c.id == post.id)
-    await database.execute(delete_query)
+    delete_query = posts.delete().where(posts.c.id == id).returning(posts.c.id)
+    deleted_id = await database.fetch_one(delete_query)
+
+    # nothing returned means nothing was deleted, so the post does not exist
+    if deleted_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    # drop the deleted post from the cache so reads don't resurrect it
+    POST_CACHE.pop(id, None)
 
 
 # creates a comment using a post id
 @app.post("/comments", response_model=CommentDB, status_code=status.HTTP_201_CREATED)
-async def create_comment(comment: CommentCreate, database: Database = Depends(get_database)) -> CommentDB:
+async def create_comment(comment: CommentCreate) -> CommentDB:
     '''
     This function is used to create a comment in the database.
-    takes two arguments, comment and database.
+    takes one argument, comment.
     comment is the comment to create.
-    database is the database connection.
     CommentDB is a class that defines a comment.
-    select_post_query is a sqlalchemy query that selects a post from the database. by matching the post id with the comment post id.
-    post is the post that was selected.
+    Instead of a pre-insert SELECT to check that the post exists, we let the
+    foreign key constraint do the check and map a foreign key violation to a
+    400 - one statement instead of three. SQLite is the exception: it ignores
+    foreign keys without a per-connection PRAGMA, so the dev path keeps the
+    explicit existence check.
     '''
-    select_post_query = posts.select().where(posts.c.id == comment.post_id)
-    post = await database.fetch_one(select_post_query)
+    if USE_SQLITE:
+        # .params() binds the id onto the pre-built select; passing a values
+        # dict alongside a Select is not supported by the databases library
+        post_exists = await database.fetch_one(SELECT_POST_ID.params(id=comment.post_id))
+        if post_exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Post {comment.post_id} does not exist",
+            )
 
-    # if the post is not found, raise a 404 error
-    if post is None:
+    # insert the comment into the database and get the full row back in the same round-trip
+    insert_query = comments.insert().values(comment.model_dump(exclude_unset=True)).returning(*comments.c)
+    try:
+        raw_comment = cast(Mapping, await database.fetch_one(insert_query))
+    except INTEGRITY_ERRORS as error:
+        # anything other than a foreign key violation is a genuine error
+        if not is_foreign_key_violation(error):
+            raise
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Post {id} does not exist"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Post {comment.post_id} does not exist",
         )
 
-    # insert the comment into the database
-    insert_query = comments.insert().values(comment.dict())
-    # execute the insert_query
-    comment_id = await database.execute(insert_query)
-    # select the comment from the database
-    select_query = comments.select().where(comments.c.id == comment_id)
-    # fetch the comment from the database
-    # cast the comment to a CommentDB object
-    raw_comment = cast(Mapping, await database.fetch_one(select_query))
-    return CommentDB(**raw_comment)
\ No newline at end of file
+    # the cached post no longer includes this comment, invalidate it
+    POST_CACHE.pop(comment.post_id, None)
+
+    return CommentDB.model_construct(**raw_comment) # RETURNING rows are DB-typed, skip re-validation
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvloop replaces asyncio's default epoll-based event loop with libuv
+    # (io_uring-backed on Linux >= 5.6), and httptools replaces the pure-Python
+    # HTTP parser - fewer syscalls and context switches on the DB-bound hot path.
+    # asyncpg >= 0.29 rides on uvloop's transports automatically.
+    uvicorn.run("app:app", loop="uvloop", http="httptools")
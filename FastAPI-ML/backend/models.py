@@ -1,24 +1,23 @@
-from sqlalchemy import Table, Column, Integer, DateTime, String, Text, MetaData, ForeignKey, create_engine, UniqueConstraint, Index
+from sqlalchemy import Table, Column, Integer, DateTime, String, Text, MetaData, ForeignKey, create_engine, UniqueConstraint, Index, func
 from datetime import datetime
 from typing import Optional, List
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
 
 
 # class PostBase is the base class for Post and Comment
-class PostBase(BaseModel): 
+class PostBase(BaseModel):
     title: str # title is a required field
     content: str # content is a required field
     publication_date: datetime = Field(default_factory=datetime.now) # publication_date is a required field
     #Field is a pydantic field that allows us to set default values for fields
     # What is Field? https://pydantic-docs.helpmanual.io/usage/fields/
-    # Config is a class that holds the configuration for a model
-    class Config:
-        orm_mode = True # this tells pydantic to use the ORM to validate the model
-        orm_mode = True
+    # from_attributes (the v2 name for orm_mode) tells pydantic to validate ORM objects
+    # pydantic v2 runs validation in compiled Rust (pydantic-core) instead of pure Python
+    model_config = ConfigDict(from_attributes=True)
 
 # class PostPartialUpdate is the base class for partial update of Post
 class PostPartialUpdate(BaseModel):
@@ -50,7 +49,7 @@ posts = Table(
     "posts",
     metadata,
     Column("id", Integer, primary_key=True, autoincrement=True), # primary key, autoincrement
-    Column("publication_date", DateTime(), nullable=False), # not nullable 
+    Column("publication_date", DateTime(), nullable=False, server_default=func.now()), # the database fills this in when the client does not send it
     Column("title", String(length=255), nullable=False), #title is not nullable
     Column("content", Text(), nullable=False), # content is not nullable
 )
@@ -85,8 +84,11 @@ class PostPublic(PostDB):
 comments = Table("comments",metadata,
     Column("id", Integer, primary_key=True, autoincrement=True),
     Column("post_id", ForeignKey("posts.id", ondelete="CASCADE"), nullable=False),
-    Column("publication_date", DateTime(), nullable=False),
-    Column("content", Text(), nullable=False)
+    Column("publication_date", DateTime(), nullable=False, server_default=func.now()),
+    Column("content", Text(), nullable=False),
+    # every post fetch filters comments by post_id; without this index that filter
+    # is a full table scan (SQLite does not index plain foreign keys by itself)
+    Index("ix_comments_post_id", "post_id")
 )
 
 
@@ -104,7 +106,7 @@ class PostTortoise(Model): # PostTortoise is the class that defines the Post tab
     Each field (or column) is an instance of a class corresponding to the type of the field. 
     '''
     id = fields.IntField(pk=True, generated=True) # id is the primary key of the table and it is automatically generated by the database
-    publication_date = fields.DatetimeField(null=False) # publication_date is a required field
+    publication_date = fields.DatetimeField(null=False, auto_now_add=True) # set on insert by the database layer
     title = fields.CharField(max_length=255, null=False) # title is a required field
     content = fields.TextField(null=False) # content is a required field
     # Meta class is a class that holds all the tables and other data structures that define the database structure
@@ -1,18 +1,26 @@
 from typing import List, Tuple
 
 from fastapi import Depends, FastAPI, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from tortoise import Tortoise
 from tortoise.contrib.fastapi import register_tortoise
 from tortoise.exceptions import DoesNotExist
 
 from tortoise.models import ( CommentBase,CommentDB,CommentTortoise,PostCreate,PostDB,PostPartialUpdate,PostPublic,PostTortoise,
 )
 
-app = FastAPI()
+# orjson serializes responses in C instead of the stdlib json module
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # check baackend.app.py for comments
-async def pagination(skip: int = Query(0, ge=0),limit: int = Query(10, ge=0)) -> Tuple[int, int]:
-    capped_limit = min(100, limit)
-    return (skip, capped_limit)
+# Query descriptors are built once at import time; the dependency is sync because it
+# never awaits (async dependencies cost an event-loop round-trip each request)
+SKIP_QUERY = Query(0, ge=0)
+LIMIT_QUERY = Query(10, ge=0)
+
+def pagination(skip: int = SKIP_QUERY, limit: int = LIMIT_QUERY) -> Tuple[int, int]:
+    return (skip, 100 if limit > 100 else limit)
 
 
 '''
@@ -20,41 +28,55 @@ The role of this dependency is to take the id in the path parameter and retrieve
 that corresponds to this identifier. The get method is a convenient shortcut for this:
     - if no matching record is found, it raises the DoesNotExist exception. If there is more than one matching record
       it raises MultipleObjectsReturned.
+The ORM is kept on this write-path dependency because update/delete need a real
+PostTortoise instance; the read endpoints below bypass it with raw SQL.
 '''
 async def get_post_or_404(id: int) -> PostTortoise:
-    # prefetch_related method on our query. By passing in the name of the related entities,
-    #  it allows you to preload them upfront when getting the main object.
     try:
-        return await PostTortoise.get(id=id).prefetch_related("comments")
+        return await PostTortoise.get(id=id)
     except DoesNotExist:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
 '''
-first, we retrieve Tortoise objects using the query language. 
-Notice that we use the all method, which gives us every object in the table. 
-Additionally, we're able to apply our pagination parameters through offset and limit.
-
-Then, we have to transform this list of PostTortoise objects into a list of PostDB objects.
+The read endpoints go straight to the connection with a raw SQL string.
+execute_query_dict gives us plain dicts, skipping the QuerySet construction and
+the row-by-row hydration into PostTortoise instances that the ORM would do.
+The raw driver hands publication_date back as a string, so the rows still get
+one pydantic-core validation pass to normalize it to the same date-time format
+the ORM-backed write endpoints emit.
 '''
+POST_LIST_ADAPTER = TypeAdapter(List[PostDB])
+
 @app.get("/posts")
 async def list_posts(pagination: Tuple[int, int] = Depends(pagination)) -> List[PostDB]:
     skip, limit = pagination
-    posts = await PostTortoise.all().offset(skip).limit(limit)
+    connection = Tortoise.get_connection("default")
+    rows = await connection.execute_query_dict(
+        "SELECT id, title, content, publication_date FROM posts LIMIT ? OFFSET ?",
+        [limit, skip],
+    )
 
-    results = [PostDB.from_orm(post) for post in posts]
-
-    return results
+    # one Rust-side pass validates the whole page of rows
+    return POST_LIST_ADAPTER.validate_python(rows)
 
 
 
 '''
 This is a simple GET endpoint that expects the ID of the post in the path parameter.
-We just have to transform our PostTortoise object into a PostDB.
-Most of the logic is in the get_post_or_404 dependency.
+Like list_posts, it reads through the raw connection instead of the ORM.
 '''
 @app.get("/posts/{id}", response_model=PostDB)
-async def get_post(post: PostTortoise = Depends(get_post_or_404)) -> PostDB:
-    return PostDB.from_orm(post)
+async def get_post(id: int) -> PostDB:
+    connection = Tortoise.get_connection("default")
+    rows = await connection.execute_query_dict(
+        "SELECT id, title, content, publication_date FROM posts WHERE id = ?", [id]
+    )
+
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    # validate rather than construct: the raw row's publication_date is a string
+    return PostDB.model_validate(rows[0])
 
 '''
 Here, we have our POST endpoint, which accepts our PostCreate model. The core logic consists then of two operations.
@@ -68,9 +90,9 @@ We get a proper PostDB instance, which we can return directly.
 '''
 @app.post("/posts", response_model=PostDB, status_code=status.HTTP_201_CREATED)
 async def create_post(post: PostCreate) -> PostDB:
-    post_tortoise = await PostTortoise.create(**post.dict())
+    post_tortoise = await PostTortoise.create(**post.model_dump(exclude_unset=True))
 
-    return PostDB.from_orm(post_tortoise)
+    return PostDB.model_validate(post_tortoise)
 
 
 
@@ -86,10 +108,12 @@ When you are happy with the data, you can persist it in the database.
 async def update_post(
     post_update: PostPartialUpdate, post: PostTortoise = Depends(get_post_or_404)
 ) -> PostDB:
-    post.update_from_dict(post_update.dict(exclude_unset=True))
+    # model_fields_set gives the fields the client actually sent without the
+    # generic model_dump walk over every field
+    post.update_from_dict({field: getattr(post_update, field) for field in post_update.model_fields_set})
     await post.save()
 
-    return PostDB.from_orm(post)
+    return PostDB.model_validate(post)
 
 
 @app.delete("/posts/{id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -113,9 +137,9 @@ async def create_comment(comment: CommentBase) -> CommentDB:
             status_code=status.HTTP_400_BAD_REQUEST, detail=f"Post {id} does not exist"
         )
 
-    comment_tortoise = await CommentTortoise.create(**comment.dict())
+    comment_tortoise = await CommentTortoise.create(**comment.model_dump(exclude_unset=True))
 
-    return CommentDB.from_orm(comment_tortoise)
+    return CommentDB.model_validate(comment_tortoise)
 '''
 Configure the Tortoise engine to set the database connection string and the location of our models. 
 To do this, Tortoise comes with a utility function for FastAPI that does all the required tasks for you.
@@ -138,3 +162,11 @@ register_tortoise(
     add_exception_handlers=True,
 )
 
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # same event-loop setup as backend/app.py: uvloop + httptools cut per-syscall
+    # overhead vs the default epoll loop and pure-Python HTTP parser
+    uvicorn.run("app:app", loop="uvloop", http="httptools")
@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import Optional, List
 
-from pydantic import BaseModel, Field, validator
+# pydantic v2: validation runs in compiled Rust (pydantic-core); from_attributes
+# replaces orm_mode and field_validator replaces validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from tortoise.models import Model
 from tortoise import fields
 
@@ -10,8 +12,7 @@ class CommentBase(BaseModel):
     publication_date: datetime = Field(default_factory=datetime.now)
     content: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CommentCreate(CommentBase):
@@ -27,8 +28,7 @@ class PostBase(BaseModel):
     content: str
     publication_date: datetime = Field(default_factory=datetime.now)
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PostPartialUpdate(BaseModel):
@@ -46,7 +46,8 @@ class PostDB(PostBase):
 class PostPublic(PostDB):
     comments: List[CommentDB]
 
-    @validator("comments", pre=True)
+    @field_validator("comments", mode="before")
+    @classmethod
     def fetch_comments(cls, v):
         return list(v)
 
@@ -60,7 +61,7 @@ giving you access to its data like any other object.
 '''
 class PostTortoise(Model):
     id = fields.IntField(pk=True, generated=True)
-    publication_date = fields.DatetimeField(null=False)
+    publication_date = fields.DatetimeField(null=False, auto_now_add=True)
     title = fields.CharField(max_length=255, null=False)
     content = fields.TextField(null=False)
 
@@ -81,8 +82,10 @@ class CommentTortoise(Model):
     post = fields.ForeignKeyField(
         "models.PostTortoise", related_name="comments", null=False
     )
-    publication_date = fields.DatetimeField(null=False)
+    publication_date = fields.DatetimeField(null=False, auto_now_add=True)
     content = fields.TextField(null=False)
 
     class Meta:
-        table = "comments"
\ No newline at end of file
+        table = "comments"
+        # the comments-for-a-post lookup filters on post_id, so index it explicitly
+        indexes = (("post_id",),)
\ No newline at end of file